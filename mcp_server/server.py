@@ -9,25 +9,144 @@ Can be run as stdio server or TCP server for remote connections.
 
 import argparse
 import asyncio
+import atexit
+import io
 import json
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
 import re
+import socket
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+import anyio
+import anyio.lowlevel
 from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
+from mcp.shared.message import SessionMessage
 from mcp.types import (
     CallToolResult,
+    JSONRPCMessage,
     ListToolsResult,
     TextContent,
     Tool,
 )
 
+# Markdown解析用の正規表現 (呼び出し毎のコンパイルを避けるためモジュールレベルで保持)
+# 変更内容は ### 変更内容 から始まり、次の ### ./filepath かコードブロックの開始の前まで
+_CHANGE_DESC_RE = re.compile(r"### 変更内容\n(.*?)(?=\n(?:### \./|```|$))", re.DOTALL)
+# 空白文字以外の1文字 (範囲が空白のみかどうかの判定に使う)
+_NON_SPACE_RE = re.compile(r"\S")
+# コードブロック開始タグの言語指定 (例: ```python)
+_FENCE_LANG_RE = re.compile(r"[a-zA-Z0-9_.-]*")
+
+# 行単位の解析の状態
+_STATE_SECTION_START = "section_start"  # セクションの先頭 (最初の空行以外の行を待つ)
+_STATE_OUTSIDE = "outside"  # ファイル定義ではないセクション
+_STATE_IN_SECTION = "in_section"  # ファイル定義内、ファイルパスヘッダーより前
+_STATE_AFTER_HEADER = "after_header"  # ファイルパスヘッダーより後 (コンテンツ候補)
+
+# このバイト数を超える入力ファイルは全体を読み込まず、行単位で読みながらファイルを作成する
+_STREAM_PARSE_THRESHOLD = 8 * 1024 * 1024
+
+
+class _LoggerQueueHandler(logging.handlers.QueueHandler):
+    """
+    追加されたロガーの元のハンドラーを記録に付けてキューに追加する QueueHandler
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler]):
+        super().__init__(log_queue)
+        self.target_handlers = tuple(handlers)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # prepare はコピーを返すため、伝播先のロガー毎に別の振り分け先を持てる
+        record = super().prepare(record)
+        record.queue_target_handlers = self.target_handlers
+        return record
+
+
+class _LoggerQueueListener(logging.handlers.QueueListener):
+    """
+    記録に付けられたハンドラーにのみ振り分ける QueueListener
+    """
+
+    def handle(self, record: logging.LogRecord) -> None:
+        record = self.prepare(record)
+        for handler in record.queue_target_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+# ログ出力用のキューとリスナー (ハンドラーの書き込みを専用スレッドで行う)
+_log_listener: Optional[_LoggerQueueListener] = None
+# キュー経由にしたロガーと、そのロガーに追加した QueueHandler
+_log_queue_handlers: List[Tuple[logging.Logger, _LoggerQueueHandler]] = []
+# stop_logging をプロセス終了時に呼び出すよう登録済みかどうか
+_log_atexit_registered = False
+
+
+def _start_log_listener(loggers: Iterable[logging.Logger]) -> None:
+    """
+    各ロガーのハンドラーを QueueListener に移し、ロガーには QueueHandler のみを残す
+
+    ログ記録の呼び出し側ではキューへの追加のみを行い、
+    コンソールやファイルへの書き込みは専用スレッドで行います。
+    キューとリスナーは全ロガーで1つを共有するため、共有ハンドラーへの出力順は
+    記録した順のままです。各記録はそれを受け取ったロガーの元のハンドラーにのみ
+    渡されるため、ロガーとハンドラーの対応も変わりません。
+    キューに残ったログはプロセス終了時に stop_logging で書き出されます。
+
+    Args:
+        loggers: 対象のロガー (ハンドラーを持たないロガーは対象外)
+    """
+    global _log_listener, _log_atexit_registered
+
+    if _log_listener is None:
+        _log_listener = _LoggerQueueListener(queue.Queue(-1))
+        _log_listener.start()
+
+    for target in loggers:
+        handlers = target.handlers[:]
+        if not handlers:
+            continue
+        for handler in handlers:
+            target.removeHandler(handler)
+
+        queue_handler = _LoggerQueueHandler(_log_listener.queue, handlers)
+        target.addHandler(queue_handler)
+        _log_queue_handlers.append((target, queue_handler))
+
+    if not _log_atexit_registered:
+        # logging.shutdown より先に実行され、キューの内容を書き出してからハンドラーを閉じる
+        atexit.register(stop_logging)
+        _log_atexit_registered = True
+
+
+def stop_logging() -> None:
+    """
+    ログ出力用のリスナーを停止し、キューに残っているログを書き出す
+
+    停止後は各ロガーに元のハンドラーを戻し、以降のログは直接書き込みます。
+    """
+    global _log_listener
+
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+    while _log_queue_handlers:
+        target, queue_handler = _log_queue_handlers.pop()
+        target.removeHandler(queue_handler)
+        for handler in queue_handler.target_handlers:
+            target.addHandler(handler)
+
 
 def setup_logging(log_level: str = "INFO", config_file: str = None) -> logging.Logger:
     """
@@ -40,6 +159,9 @@ def setup_logging(log_level: str = "INFO", config_file: str = None) -> logging.L
     Returns:
         Logger: 設定されたロガー
     """
+    # 再設定時は、以前のリスナーに残っているログを書き出してから停止する
+    stop_logging()
+
     # ログディレクトリの作成
     log_dir = "logs"
     if not os.path.exists(log_dir):
@@ -66,11 +188,17 @@ def setup_logging(log_level: str = "INFO", config_file: str = None) -> logging.L
 
             logging.config.dictConfig(config_dict)
             logger = logging.getLogger("mcp_file_generator")
+            # 設定ファイルで定義されたロガーは同じハンドラーを共有するため、すべてキュー経由にする
+            _start_log_listener(
+                [logging.getLogger()]
+                + [logging.getLogger(name) for name in config_dict.get("loggers", {})]
+            )
             logger.info(f"ログ設定ファイルを読み込みました: {config_file}")
             return logger
 
         except Exception as e:
-            print(f"ログ設定ファイルの読み込みに失敗しました: {e}")
+            # 標準出力は stdio モードで MCP プロトコルに使われるため、標準エラーに出力する
+            print(f"ログ設定ファイルの読み込みに失敗しました: {e}", file=sys.stderr)
             # フォールバック処理に続行
 
     # デフォルトのログ設定
@@ -125,6 +253,7 @@ def setup_logging(log_level: str = "INFO", config_file: str = None) -> logging.L
     except Exception as e:
         logger.warning(f"ログファイルの作成に失敗しました: {e}")
 
+    _start_log_listener([logger])
     return logger
 
 
@@ -212,6 +341,115 @@ async def handle_call_tool(
         )
 
 
+def _iter_section_starts(md_content: str) -> Iterator[Tuple[int, int]]:
+    """
+    Markdownコンテンツをセクションに分割し、各セクションの範囲を返します。
+
+    各セクションは、'## ./' で始まる行か、'___' で始まる行の直前で分割されます。
+    正規表現を使わず str.find で次の区切り位置を探すため、入力全体を一度だけ走査します。
+
+    Args:
+        md_content (str): input.md ファイルの内容。
+
+    Yields:
+        tuple: セクションの (開始位置, 終了位置)。
+    """
+    next_file = md_content.find("\n## ./")
+    next_rule = md_content.find("\n___")
+    start = 0
+
+    while next_file != -1 or next_rule != -1:
+        if next_rule == -1 or (next_file != -1 and next_file < next_rule):
+            boundary = next_file + 1
+            next_file = md_content.find("\n## ./", boundary)
+        else:
+            boundary = next_rule + 1
+            next_rule = md_content.find("\n___", boundary)
+        yield start, boundary
+        start = boundary
+
+    yield start, len(md_content)
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """
+    text[start:end].strip() に相当する範囲を、部分文字列を作らずに返します。
+
+    Args:
+        text (str): 対象の文字列。
+        start (int): 範囲の開始位置。
+        end (int): 範囲の終了位置。
+
+    Returns:
+        tuple: 前後の空白文字を除いた (開始位置, 終了位置)。
+               範囲が空白文字のみの場合は (end, end)。
+    """
+    # 先頭側は正規表現で最初の非空白文字を探し、空白のみの範囲は1回の検索で判定する
+    match = _NON_SPACE_RE.search(text, start, end)
+    if match is None:
+        return end, end
+    start = match.start()
+    # 末尾側は窓を倍々に広げながら rstrip し、長い空白の連続も少ない反復で除去する
+    window = 64
+    while text[end - 1].isspace():
+        window_start = max(start, end - window)
+        end = window_start + len(text[window_start:end].rstrip())
+        window *= 2
+    return start, end
+
+
+def _find_code_block(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """
+    text[start:end] 全体が1つのコードブロックであれば、その中身の範囲を返します。
+
+    開始タグ (```言語指定) は範囲の先頭、閉じタグ (```) は範囲の末尾にある必要があります。
+    中身に含まれる入れ子のコードブロックはそのまま中身として扱われます。
+    正規表現を使わず str.find / str.rfind で探すため、閉じタグがない場合も線形時間で終わります。
+
+    Args:
+        text (str): 対象の文字列。
+        start (int): 範囲の開始位置 (前後の空白文字は除去済みであること)。
+        end (int): 範囲の終了位置。
+
+    Returns:
+        tuple | None: 中身の前後の空白文字を除いた (開始位置, 終了位置)。
+                      コードブロックの形式でない場合は None。
+    """
+    if not text.startswith("```", start, end):
+        return None
+
+    # 開始タグの行末と、末尾の閉じタグ
+    open_nl = text.find("\n", start, end)
+    close = text.rfind("\n```", start, end)
+    if open_nl == -1 or close <= open_nl or close + 4 != end:
+        return None
+    if not _FENCE_LANG_RE.fullmatch(text, start + 3, open_nl):
+        return None
+
+    return _strip_span(text, open_nl + 1, close)
+
+
+def _warn_missing_header(filepath: str, header_marker: str) -> None:
+    """
+    ファイルパスヘッダー (### ./filepath) が見つからない場合の警告を出力します。
+    """
+    logger.warning(
+        f"警告: ファイル '{filepath}' のコンテンツ開始マーカー "
+        f"'{header_marker}' が見つかりません。"
+        "このファイルは作成されません。"
+    )
+
+
+def _warn_invalid_code_block(filepath: str) -> None:
+    """
+    コンテンツのコードブロックが見つからない場合の警告を出力します。
+    """
+    logger.warning(
+        f"警告: ファイル '{filepath}' のコンテンツブロックが"
+        "見つからないか、形式が不正です。このファイルは作成されません。"
+    )
+
+
 def parse_input_md_sections(md_content: str) -> List[Dict[str, str]]:
     """
     input.md の内容を解析し、ファイル情報を抽出します。
@@ -226,93 +464,83 @@ def parse_input_md_sections(md_content: str) -> List[Dict[str, str]]:
               'change_description': str, 変更内容の説明（オプション）。
     """
     logger.info("Markdownコンテンツの解析を開始")
-    logger.debug(f"入力コンテンツサイズ: {len(md_content)} 文字")
+    logger.debug("入力コンテンツサイズ: %d 文字", len(md_content))
 
     files_to_create = []
 
     # 全体のMarkdownコンテンツを、ファイル定義セクションとそれ以外のセクションに分割
-    # 各セクションは、'## ./' で始まる行か、'___' で始まる行の直前で分割される
-    # FLAGS: re.DOTALL は . が改行にもマッチ, re.MULTILINE は ^$ が各行の始まり/終わりにマッチ
-    all_sections = re.split(r"(?=(?:^## \./|^___))", md_content, flags=re.MULTILINE)
-    logger.debug(f"セクション分割結果: {len(all_sections)} 個のセクション")
-
-    for i, section_block in enumerate(all_sections):
-        section_block = section_block.strip()
-        if not section_block:
-            logger.debug(f"セクション {i+1}: 空のセクションをスキップ")
+    # 各セクションは部分文字列を作らず、md_content 内の (start, end) 範囲として扱う
+    for i, (start, end) in enumerate(_iter_section_starts(md_content)):
+        start, end = _strip_span(md_content, start, end)
+        if start == end:
+            logger.debug("セクション %d: 空のセクションをスキップ", i + 1)
             continue
 
-        logger.debug(f"セクション {i+1} を処理中 (サイズ: {len(section_block)} 文字)")
+        logger.debug("セクション %d を処理中 (サイズ: %d 文字)", i + 1, end - start)
 
-        # セクションの主要なファイルパスを検索 (例: ## ./README.md)
-        filepath_match = re.search(r"^## \./(.+?)$", section_block, re.MULTILINE)
+        # セクションの主要なファイルパスを取得 (例: ## ./README.md)
+        # '## ./' の行は必ずセクションの先頭にあるため、先頭行のみを確認する
+        current_filepath = ""
+        filepath_line_end = end
+        if md_content.startswith("## ./", start, end):
+            filepath_line_end = md_content.find("\n", start + 5, end)
+            if filepath_line_end == -1:
+                filepath_line_end = end
+            current_filepath = md_content[start + 5 : filepath_line_end].strip()
 
-        if not filepath_match:
+        if not current_filepath:
             # このセクションは '## ./' の形式ではないため、ファイル定義ではないと判断しスキップ
-            logger.debug(f"セクション {i+1}: ファイル定義ではないためスキップ")
+            logger.debug("セクション %d: ファイル定義ではないためスキップ", i + 1)
             continue
 
-        current_filepath = filepath_match.group(1).strip()
-        logger.info(f"ファイル定義を発見: {current_filepath}")
+        logger.info("ファイル定義を発見: %s", current_filepath)
 
-        # 変更内容を検索 (オプション) (例: ### 変更内容)
-        change_desc = ""
-        # 変更内容は ### 変更内容 から始まり、次の ### ./filepath かコードブロックの開始の前まで
-        change_desc_match = re.search(
-            r"### 変更内容\n(.*?)(?=\n(?:### \./|```|$))", section_block, re.DOTALL
-        )
-        if change_desc_match:
-            change_desc = change_desc_match.group(1).strip()
-            logger.debug(f"変更内容を発見: {change_desc[:100]}...")
+        # セクションは先頭から順に一度だけ走査する:
+        #   パス行の後 〜 ファイルパスヘッダー: 変更内容 (オプション)
+        #   ファイルパスヘッダーの後 〜 セクション末尾: コードブロック
+        # 変更内容の検索範囲をヘッダーの手前までに限定し、コンテンツ本体を再走査しない
 
         # ___ コンテンツブロックを検索するロジックを改善 ___
         content = ""
 
         # まず、ファイルパスヘッダー (### ./filepath) の開始位置を探す
         filepath_header_marker = f"### ./{current_filepath}"
-        filepath_header_pos = section_block.find(filepath_header_marker)
+        filepath_header_pos = md_content.find(
+            filepath_header_marker, filepath_line_end, end
+        )
 
         if filepath_header_pos == -1:
-            warning_msg = (
-                f"警告: ファイル '{current_filepath}' のコンテンツ開始マーカー "
-                f"'{filepath_header_marker}' が見つかりません。"
-                "このファイルは作成されません。"
-            )
-            logger.warning(warning_msg)
-            print(warning_msg)
+            _warn_missing_header(current_filepath, filepath_header_marker)
             continue
 
+        # 変更内容を検索 (オプション) (例: ### 変更内容)
+        change_desc = ""
+        change_desc_match = _CHANGE_DESC_RE.search(
+            md_content, filepath_line_end, filepath_header_pos
+        )
+        if change_desc_match:
+            change_desc = change_desc_match.group(1).strip()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("変更内容を発見: %s...", change_desc[:100])
+
         # ヘッダー以降の文字列 (コンテンツ候補)
         # ヘッダーの終端からセクションの終わりまで
-        content_candidate = section_block[
-            filepath_header_pos + len(filepath_header_marker) :
-        ].strip()
-        logger.debug(f"コンテンツ候補サイズ: {len(content_candidate)} 文字")
-
-        # コードブロックの正規表現をより厳密に定義
-        # `(```[a-zA-Z0-9_.-]*)\n`: 開始タグ (言語指定あり/なし) と改行
-        # `(.*?)`: コンテンツ本体 (非貪欲マッチ)
-        # `\n(```\s*)$`: 閉じタグと、その後は空白文字か行末のみ
-        code_block_regex = re.compile(
-            r"^(```[a-zA-Z0-9_.-]*)\n(.*?)\n(```\s*)$", re.DOTALL
+        candidate_start, candidate_end = _strip_span(
+            md_content, filepath_header_pos + len(filepath_header_marker), end
         )
+        logger.debug("コンテンツ候補サイズ: %d 文字", candidate_end - candidate_start)
 
-        code_block_match = code_block_regex.search(content_candidate)
+        code_block_span = _find_code_block(md_content, candidate_start, candidate_end)
 
-        if code_block_match:
-            # 修正: コードブロックの中身 (group(2)) のみをコンテンツとして抽出
-            content = code_block_match.group(2).strip()
-            logger.debug(f"コードブロックを発見: {len(content)} 文字のコンテンツ")
+        if code_block_span is not None:
+            # 修正: コードブロックの中身のみをコンテンツとして抽出
+            content = md_content[code_block_span[0] : code_block_span[1]]
+            logger.debug("コードブロックを発見: %d 文字のコンテンツ", len(content))
 
         else:
             # コードブロックが見つからない場合、警告を出力してスキップ
             # `## ./` の形式でも、コードブロックがなければファイルは作成しない方針を維持
-            warning_msg = (
-                f"警告: ファイル '{current_filepath}' のコンテンツブロックが"
-                "見つからないか、形式が不正です。このファイルは作成されません。"
-            )
-            logger.warning(warning_msg)
-            print(warning_msg)
+            _warn_invalid_code_block(current_filepath)
             continue  # コードブロックが見つからない場合はスキップ
 
         if current_filepath and content:
@@ -322,19 +550,248 @@ def parse_input_md_sections(md_content: str) -> List[Dict[str, str]]:
                 "change_description": change_desc,
             }
             files_to_create.append(file_info)
-            logger.info(f"ファイル情報を追加: {current_filepath}")
+            logger.info("ファイル情報を追加: %s", current_filepath)
         # else: コンテンツが空の場合はすでに警告を出してcontinueしているため、不要
 
-    logger.info(f"解析完了: {len(files_to_create)} 個のファイルが処理対象")
+    logger.info("解析完了: %d 個のファイルが処理対象", len(files_to_create))
     return files_to_create
 
 
-def create_files_from_parsed_data(
+def _iter_file_infos_from_lines(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """
+    改行付きの行を順に読み、セクションが終わる度にファイル情報を返します。
+
+    状態は _STATE_SECTION_START -> _STATE_IN_SECTION -> _STATE_AFTER_HEADER と進み、
+    '## ./' か '___' で始まる行で次のセクションに移ります。保持するのは処理中の
+    セクションの行のみで、解析結果は parse_input_md_sections と同じになります。
+
+    Args:
+        lines (iterable): 改行文字付きの行 (ファイルオブジェクトなど)。
+
+    Yields:
+        dict: parse_input_md_sections と同じ形式のファイル情報辞書。
+    """
+    state = _STATE_SECTION_START
+    section_index = 1
+    current_filepath = ""
+    header_marker = ""
+    # ファイルパス行の改行からファイルパスヘッダーの直前まで (変更内容の検索範囲)
+    pre_header_lines = ["\n"]
+    # ファイルパスヘッダーの直後からセクション末尾まで (コンテンツ候補)
+    candidate_lines = []
+
+    for line in lines:
+        if line.startswith("## ./") or line.startswith("___"):
+            file_info = _finish_stateful_section(
+                state,
+                section_index,
+                current_filepath,
+                header_marker,
+                pre_header_lines,
+                candidate_lines,
+            )
+            if file_info is not None:
+                yield file_info
+
+            state = _STATE_SECTION_START
+            section_index += 1
+            current_filepath = ""
+            pre_header_lines = ["\n"]
+            candidate_lines = []
+
+        if state == _STATE_SECTION_START:
+            if line.isspace():
+                continue
+            # セクションの最初の行が '## ./' で始まる場合のみファイル定義とする
+            first_line = line.lstrip()
+            if first_line.startswith("## ./"):
+                current_filepath = first_line[5:].strip()
+            if current_filepath:
+                logger.info("ファイル定義を発見: %s", current_filepath)
+                header_marker = f"### ./{current_filepath}"
+                state = _STATE_IN_SECTION
+            else:
+                logger.debug(
+                    "セクション %d: ファイル定義ではないためスキップ", section_index
+                )
+                state = _STATE_OUTSIDE
+        elif state == _STATE_IN_SECTION:
+            header_pos = line.find(header_marker)
+            if header_pos == -1:
+                pre_header_lines.append(line)
+            else:
+                pre_header_lines.append(line[:header_pos])
+                candidate_lines.append(line[header_pos + len(header_marker) :])
+                state = _STATE_AFTER_HEADER
+        elif state == _STATE_AFTER_HEADER:
+            candidate_lines.append(line)
+
+    file_info = _finish_stateful_section(
+        state,
+        section_index,
+        current_filepath,
+        header_marker,
+        pre_header_lines,
+        candidate_lines,
+    )
+    if file_info is not None:
+        yield file_info
+
+
+def _finish_stateful_section(
+    state: str,
+    section_index: int,
+    filepath: str,
+    header_marker: str,
+    pre_header_lines: List[str],
+    candidate_lines: List[str],
+) -> Optional[Dict[str, str]]:
+    """
+    行単位の解析で1つのセクションが終わった時点の状態から、ファイル情報を組み立てます。
+
+    Returns:
+        dict | None: ファイル情報辞書。ファイルを作成しないセクションの場合は None。
+    """
+    if state == _STATE_SECTION_START:
+        logger.debug("セクション %d: 空のセクションをスキップ", section_index)
+        return None
+    if state == _STATE_OUTSIDE:
+        return None
+    if state == _STATE_IN_SECTION:
+        _warn_missing_header(filepath, header_marker)
+        return None
+
+    # 変更内容はヘッダーより前の短い範囲のみを対象に、parse_input_md_sections と同じ規則で探す
+    change_desc = ""
+    change_desc_match = _CHANGE_DESC_RE.search("".join(pre_header_lines))
+    if change_desc_match:
+        change_desc = change_desc_match.group(1).strip()
+
+    # コンテンツ候補は閉じタグが確定するセクション末尾で一度だけ連結する
+    candidate = "".join(candidate_lines)
+    code_block_span = _find_code_block(
+        candidate, *_strip_span(candidate, 0, len(candidate))
+    )
+    if code_block_span is None:
+        _warn_invalid_code_block(filepath)
+        return None
+
+    content = candidate[code_block_span[0] : code_block_span[1]]
+    if not content:
+        return None
+
+    logger.info("ファイル情報を追加: %s", filepath)
+    return {
+        "filepath": filepath,
+        "content": content,
+        "change_description": change_desc,
+    }
+
+
+def _read_text(filepath: str) -> str:
+    """
+    テキストファイルを UTF-8 として読み込みます。
+
+    ワーカースレッドから呼び出されることを想定しています。
+
+    Args:
+        filepath (str): 読み込むファイルのパス。
+
+    Returns:
+        str: ファイルの内容。
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _make_dirs(dir_names: Set[str]) -> None:
+    """
+    ファイル作成に必要なディレクトリをまとめて作成します。
+
+    ワーカースレッドから呼び出されることを想定しています。
+
+    Args:
+        dir_names (set): 作成するディレクトリパスの集合。
+    """
+    for dir_name in dir_names:
+        logger.debug("ディレクトリを作成: %s", dir_name)
+        try:
+            os.makedirs(dir_name, exist_ok=True)
+            logger.debug("ディレクトリ作成成功: %s", dir_name)
+        except Exception as e:
+            logger.error("ディレクトリ作成失敗: %s, エラー: %s", dir_name, e)
+
+
+def _write_file(filepath: str, content: str) -> None:
+    """
+    ファイルを1件書き込みます。親ディレクトリは作成済みであることを前提とします。
+
+    内容は一度だけ UTF-8 にエンコードし、os.write で直接書き込みます。
+    ワーカースレッドから呼び出されることを想定しています。
+
+    Args:
+        filepath (str): 書き込み先のファイルパス。
+        content (str): ファイルの内容。
+
+    Raises:
+        IOError: ファイルの書き込みに失敗した場合。
+    """
+    data = memoryview(content.encode("utf-8"))
+    # O_BINARY (Windows のみ) で改行コードの変換を行わず、内容をそのまま書き込む
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(filepath, flags, 0o666)
+    try:
+        # 通常のファイルでは1回の呼び出しで書き終わるが、部分書き込みにも備える
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+
+def _base_prefix(base_dir: str) -> str:
+    """
+    ベースディレクトリの接頭辞 (末尾に区切り文字付き) を返します。
+
+    各ファイルのパスは、この接頭辞との文字列連結で組み立てます。
+    """
+    return base_dir.rstrip(os.sep + (os.altsep or "")) + os.sep if base_dir else ""
+
+
+def _target_dir(base_dir: str, base_prefix: str, relative_filepath: str) -> str:
+    """
+    ファイルの作成先ディレクトリを返します。
+    """
+    sep_idx = max(relative_filepath.rfind("/"), relative_filepath.rfind(os.sep))
+    return base_prefix + relative_filepath[:sep_idx] if sep_idx != -1 else base_dir
+
+
+def _write_created_entry(
+    results: io.StringIO, file_info: Dict[str, str], filepath: str
+) -> None:
+    """
+    作成に成功したファイルの結果をバッファに書き込みます。
+    """
+    results.write("\n# ")
+    results.write(file_info["filepath"])
+    results.write("\nファイルを作成/更新しました\n")
+    results.write(filepath)
+    if file_info.get("change_description"):
+        results.write("\n## 変更内容\n")
+        results.write(file_info["change_description"])
+        results.write("\n___")
+
+
+async def create_files_from_parsed_data(
     parsed_data: List[Dict[str, str]], base_dir: str = "."
 ) -> str:
     """
     解析されたデータに基づいてファイルとディレクトリを作成します。
 
+    必要なディレクトリを先に一度だけ作成し、各ファイルの書き込みは
+    asyncio.to_thread でワーカースレッドに振り分けて並行して実行します。
+    同じファイルを指すパスが複数回指定された場合は、表記が異なっていても
+    (例: 'a.txt' と './a.txt')、最後の内容のみを書き込みます。
+
     Args:
         parsed_data (list): parse_input_md_sections からのファイル情報辞書のリスト。
         base_dir (str): ファイルが作成されるベースディレクトリ。
@@ -343,59 +800,160 @@ def create_files_from_parsed_data(
         str: 作成結果の詳細
     """
     logger.info("ファイル作成処理を開始")
-    logger.debug(f"ベースディレクトリ: {base_dir}")
-    logger.debug(f"作成対象ファイル数: {len(parsed_data)}")
+    logger.debug("ベースディレクトリ: %s", base_dir)
+    logger.debug("作成対象ファイル数: %d", len(parsed_data))
 
     if not parsed_data:
         logger.warning("作成するファイルがありません")
         return "作成するファイルがありません。"
 
-    results = []
-    results.append("___")
+    # 結果は行毎のリストを作らず、バッファに直接書き込む
+    results = io.StringIO()
+    results.write("___")
     created_files = 0
     failed_files = 0
 
+    # ベースディレクトリの接頭辞は一度だけ組み立て、各パスは文字列連結で作る
+    base_prefix = _base_prefix(base_dir)
+
+    # 書き込み対象を正規化したパス毎にまとめる (後の定義が優先される)
+    # 同じファイルへの書き込みが並行して競合しないよう、表記の違いはここで吸収する
+    filepaths = []
+    path_keys = []
+    writes_by_key = {}
+    dir_names = set()
     for i, file_info in enumerate(parsed_data):
         relative_filepath = file_info["filepath"]
-        filepath = os.path.join(base_dir, relative_filepath)
+        filepath = base_prefix + relative_filepath
         content = file_info["content"]
 
-        logger.info(f"ファイル {i+1}/{len(parsed_data)} を処理中: {relative_filepath}")
-        logger.debug(f"絶対パス: {filepath}")
-        logger.debug(f"コンテンツサイズ: {len(content)} 文字")
-
-        dir_name = os.path.dirname(filepath)
+        logger.info(
+            "ファイル %d/%d を処理中: %s", i + 1, len(parsed_data), relative_filepath
+        )
+        logger.debug("絶対パス: %s", filepath)
+        logger.debug("コンテンツサイズ: %d 文字", len(content))
+
+        path_key = os.path.normcase(os.path.abspath(filepath))
+        filepaths.append(filepath)
+        path_keys.append(path_key)
+        writes_by_key[path_key] = (filepath, content)
+        dir_name = _target_dir(base_dir, base_prefix, relative_filepath)
         if dir_name:
-            logger.debug(f"ディレクトリを作成: {dir_name}")
-            try:
-                os.makedirs(dir_name, exist_ok=True)
-                logger.debug(f"ディレクトリ作成成功: {dir_name}")
-            except Exception as e:
-                logger.error(f"ディレクトリ作成失敗: {dir_name}, エラー: {e}")
+            dir_names.add(dir_name)
 
-        try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(content)
-
-            logger.info(f"ファイル作成成功: {filepath}")
-            created_files += 1
-
-            results.append(f"# {file_info['filepath']}")
-            results.append("ファイルを作成/更新しました")
-            results.append(f"{filepath}")
-            if file_info.get("change_description"):
-                results.append("## 変更内容")
-                results.append(f"{file_info['change_description']}")
-                results.append("___")
-
-        except IOError as e:
-            error_msg = f"ファイル '{filepath}' の書き込み中にエラーが発生しました: {e}"
+    # 同じディレクトリに対する makedirs はバッチ内で一度だけ実行する
+    await asyncio.to_thread(_make_dirs, dir_names)
+
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.to_thread(_write_file, filepath, content)
+            for filepath, content in writes_by_key.values()
+        ),
+        return_exceptions=True,
+    )
+    outcomes_by_key = dict(zip(writes_by_key, outcomes))
+
+    for file_info, filepath, path_key in zip(parsed_data, filepaths, path_keys):
+        outcome = outcomes_by_key[path_key]
+
+        if isinstance(outcome, IOError):
+            error_msg = (
+                f"ファイル '{filepath}' の書き込み中にエラーが発生しました: {outcome}"
+            )
             logger.error(error_msg)
             failed_files += 1
-            results.append(error_msg)
+            results.write("\n")
+            results.write(error_msg)
+            continue
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+        logger.info("ファイル作成成功: %s", filepath)
+        created_files += 1
+        _write_created_entry(results, file_info, filepath)
+
+    logger.info("ファイル作成処理完了: 成功=%d, 失敗=%d", created_files, failed_files)
+    return results.getvalue()
+
+
+def _create_files_from_markdown_stream(
+    input_file_path: str, base_dir: str = "."
+) -> Tuple[int, str, Optional[str]]:
+    """
+    入力ファイルを行単位で読みながら解析し、セクションが終わる度にファイルを作成します。
+
+    入力全体を読み込まないため、保持するのは処理中のセクションのみです。
+    結果は parse_input_md_sections と create_files_from_parsed_data を
+    順に実行した場合と同じ形式です。ワーカースレッドから呼び出されることを想定しています。
+
+    この処理はアトミックではありません。入力の途中で読み込みに失敗した場合
+    (例: UTF-8 として不正なバイト)、それまでに作成/上書きしたファイルはそのまま残ります。
+    その場合も処理を中断して、ここまでの作成結果とエラー内容を返します。
+
+    Args:
+        input_file_path (str): 入力ファイルのパス。
+        base_dir (str): ファイルが作成されるベースディレクトリ。
+
+    Returns:
+        tuple: (解析されたファイル数, 作成結果の詳細, 途中で中断した場合のエラー内容)
+    """
+    logger.info("ファイル作成処理を開始 (行単位の読み込み)")
+    logger.debug("ベースディレクトリ: %s", base_dir)
+
+    results = io.StringIO()
+    results.write("___")
+    parsed_files = 0
+    created_files = 0
+    failed_files = 0
+
+    base_prefix = _base_prefix(base_dir)
+    created_dirs = set()
+
+    try:
+        with open(input_file_path, "r", encoding="utf-8") as f:
+            for file_info in _iter_file_infos_from_lines(f):
+                parsed_files += 1
+                relative_filepath = file_info["filepath"]
+                filepath = base_prefix + relative_filepath
+                content = file_info["content"]
+
+                logger.info("ファイル %d を処理中: %s", parsed_files, relative_filepath)
+                logger.debug("絶対パス: %s", filepath)
+                logger.debug("コンテンツサイズ: %d 文字", len(content))
+
+                dir_name = _target_dir(base_dir, base_prefix, relative_filepath)
+                if dir_name and dir_name not in created_dirs:
+                    _make_dirs({dir_name})
+                    created_dirs.add(dir_name)
+
+                try:
+                    _write_file(filepath, content)
+                except IOError as e:
+                    error_msg = (
+                        f"ファイル '{filepath}' の書き込み中にエラーが発生しました: {e}"
+                    )
+                    logger.error(error_msg)
+                    failed_files += 1
+                    results.write("\n")
+                    results.write(error_msg)
+                    continue
+
+                logger.info("ファイル作成成功: %s", filepath)
+                created_files += 1
+                _write_created_entry(results, file_info, filepath)
+    except Exception as e:
+        # 作成済みのファイルは元に戻せないため、何が作成されたかを呼び出し元に返す
+        logger.error(
+            "入力ファイルの処理を中断: 成功=%d, 失敗=%d, エラー: %s",
+            created_files,
+            failed_files,
+            e,
+            exc_info=True,
+        )
+        return parsed_files, results.getvalue(), str(e)
 
-    logger.info(f"ファイル作成処理完了: 成功={created_files}, 失敗={failed_files}")
-    return "\n".join(results)
+    logger.info("ファイル作成処理完了: 成功=%d, 失敗=%d", created_files, failed_files)
+    return parsed_files, results.getvalue(), None
 
 
 async def generate_files_from_markdown(
@@ -417,22 +975,28 @@ async def generate_files_from_markdown(
     try:
         # 入力ファイルの存在確認
         logger.debug(f"入力ファイルの存在確認: {input_file_path}")
-        if not os.path.exists(input_file_path):
+        # ファイルシステムへのアクセスはワーカースレッドで行い、イベントループを止めない
+        if not await asyncio.to_thread(os.path.exists, input_file_path):
             error_msg = f"入力ファイル '{input_file_path}' が見つかりません。"
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
 
-        # 入力ファイルの読み込み
-        logger.info(f"入力ファイルを読み込み中: {input_file_path}")
-        with open(input_file_path, "r", encoding="utf-8") as f:
-            md_content = f.read()
-        logger.debug(f"入力ファイル読み込み完了: {len(md_content)} 文字")
+        # 大きな入力ファイルは全体を読み込まず、解析とファイル作成を行単位で進める
+        # (この場合、入力の途中で失敗しても作成済みのファイルは残る)
+        input_size = await asyncio.to_thread(os.path.getsize, input_file_path)
+        stream_input = input_size > _STREAM_PARSE_THRESHOLD
+
+        if not stream_input:
+            # 入力ファイルの読み込み
+            logger.info(f"入力ファイルを読み込み中: {input_file_path}")
+            md_content = await asyncio.to_thread(_read_text, input_file_path)
+            logger.debug(f"入力ファイル読み込み完了: {len(md_content)} 文字")
 
         # 出力ディレクトリの作成
         logger.debug(f"出力ディレクトリの確認: {root_directory}")
-        if not os.path.exists(root_directory):
+        if not await asyncio.to_thread(os.path.exists, root_directory):
             logger.info(f"出力ディレクトリを作成: {root_directory}")
-            os.makedirs(root_directory, exist_ok=True)
+            await asyncio.to_thread(os.makedirs, root_directory, exist_ok=True)
             output_msg = f"出力ディレクトリを作成しました: {root_directory}\n"
         else:
             logger.debug(f"出力ディレクトリは既に存在: {root_directory}")
@@ -441,23 +1005,42 @@ async def generate_files_from_markdown(
                 "ファイルはここに作成/上書きされます。\n"
             )
 
-        # Markdownの解析
-        logger.info("Markdownの解析を開始")
-        parsed_files = parse_input_md_sections(md_content)
-
-        if not parsed_files:
+        if stream_input:
+            # Markdownの解析とファイル作成 (1つのワーカースレッドで順に行う)
+            logger.info(
+                f"入力ファイルを行単位で読み込みながら処理: {input_size} バイト"
+            )
+            parsed_count, creation_result, stream_error = await asyncio.to_thread(
+                _create_files_from_markdown_stream, input_file_path, root_directory
+            )
+            if stream_error is not None:
+                # 途中までに作成/上書きしたファイルは残るため、その結果とあわせて返す
+                return (
+                    f"{output_msg}{creation_result}\n\n"
+                    f"エラーが発生しました: {stream_error}\n"
+                    "入力の途中で処理を中断しました。上記以外のファイルは作成されていません。"
+                )
+        else:
+            # Markdownの解析
+            logger.info("Markdownの解析を開始")
+            # 大きな入力の解析は CPU 負荷が高いため、イベントループを止めないよう別スレッドで行う
+            parsed_files = await asyncio.to_thread(parse_input_md_sections, md_content)
+            parsed_count = len(parsed_files)
+
+            if parsed_files:
+                # ファイル作成
+                logger.info("ファイル作成処理を開始")
+                creation_result = await create_files_from_parsed_data(
+                    parsed_files, base_dir=root_directory
+                )
+
+        if not parsed_count:
             error_msg = (
                 f"'{input_file_path}' からファイル情報が正常に解析されませんでした。"
             )
             logger.error(error_msg)
             return error_msg
 
-        # ファイル作成
-        logger.info("ファイル作成処理を開始")
-        creation_result = create_files_from_parsed_data(
-            parsed_files, base_dir=root_directory
-        )
-
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
         logger.info(f"ファイル生成処理完了: 処理時間={processing_time:.2f}秒")
@@ -495,27 +1078,93 @@ async def run_stdio_server():
         raise
 
 
-async def run_tcp_server(host: str = "localhost", port: int = 8000):
+# TCPモードで1メッセージ (1行) として受け付ける最大バイト数
+TCP_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+@asynccontextmanager
+async def tcp_server_transport(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+):
     """
-    TCP接続を使用してMCPサーバーを起動
+    TCP接続の StreamReader/StreamWriter を MCP サーバー用のストリームに変換する
+
+    stdio_server と同じく、1行を1つの JSON-RPC メッセージとして送受信します。
 
     Args:
-        host: バインドするIPアドレス
-        port: リッスンするポート番号
-    """
-    logger.info(f"TCPサーバーを起動中: {host}:{port}")
+        reader: クライアントからの受信ストリーム
+        writer: クライアントへの送信ストリーム
 
-    async def handle_client(reader, writer):
-        """
-        クライアント接続を処理
-        """
-        client_addr = writer.get_extra_info("peername")
-        logger.info(f"クライアント接続: {client_addr}")
+    Yields:
+        tuple: server.run に渡す (read_stream, write_stream)
+    """
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
 
+    async def tcp_reader():
+        try:
+            async with read_stream_writer:
+                async for line in reader:
+                    try:
+                        message = JSONRPCMessage.model_validate_json(
+                            line.decode("utf-8", errors="replace")
+                        )
+                    except Exception as exc:
+                        await read_stream_writer.send(exc)
+                        continue
+                    await read_stream_writer.send(SessionMessage(message))
+        except (anyio.ClosedResourceError, ConnectionError):
+            # クライアントの切断は受信終了として扱う
+            await anyio.lowlevel.checkpoint()
+
+    async def tcp_writer():
         try:
+            async with write_stream_reader:
+                async for session_message in write_stream_reader:
+                    json_str = session_message.message.model_dump_json(
+                        by_alias=True, exclude_none=True
+                    )
+                    writer.write((json_str + "\n").encode("utf-8"))
+                    await writer.drain()
+        except (anyio.ClosedResourceError, ConnectionError):
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(tcp_reader)
+        tg.start_soon(tcp_writer)
+        yield read_stream, write_stream
+
+
+async def _handle_tcp_client(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """
+    TCPクライアントの接続を処理
+
+    接続毎に MCP サーバーのセッションを実行し、終了時に接続を閉じます。
+
+    Args:
+        reader: クライアントからの受信ストリーム
+        writer: クライアントへの送信ストリーム
+    """
+    client_addr = writer.get_extra_info("peername")
+    logger.info(f"クライアント接続: {client_addr}")
+
+    # 小さな MCP メッセージを Nagle アルゴリズムで遅延させない
+    # 長時間のセッションに備えて TCP キープアライブも有効にする
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+    try:
+        async with tcp_server_transport(reader, writer) as (
+            read_stream,
+            write_stream,
+        ):
             await server.run(
-                reader,
-                writer,
+                read_stream,
+                write_stream,
                 InitializationOptions(
                     server_name="file-generator-mcp",
                     server_version="1.0.0",
@@ -525,19 +1174,31 @@ async def run_tcp_server(host: str = "localhost", port: int = 8000):
                     ),
                 ),
             )
-        except Exception as e:
-            logger.error(
-                f"クライアント接続エラー: {client_addr}, エラー: {e}", exc_info=True
-            )
-            print(f"クライアント接続エラー: {e}")
-        finally:
-            logger.info(f"クライアント接続を終了: {client_addr}")
-            writer.close()
-            await writer.wait_closed()
+    except Exception as e:
+        logger.error(
+            f"クライアント接続エラー: {client_addr}, エラー: {e}", exc_info=True
+        )
+    finally:
+        logger.info(f"クライアント接続を終了: {client_addr}")
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_tcp_server(host: str = "localhost", port: int = 8000):
+    """
+    TCP接続を使用してMCPサーバーを起動
+
+    Args:
+        host: バインドするIPアドレス
+        port: リッスンするポート番号
+    """
+    logger.info(f"TCPサーバーを起動中: {host}:{port}")
 
     try:
         # TCPサーバーを起動
-        tcp_server = await asyncio.start_server(handle_client, host, port)
+        tcp_server = await asyncio.start_server(
+            _handle_tcp_client, host, port, limit=TCP_STREAM_LIMIT
+        )
 
         addr = tcp_server.sockets[0].getsockname()
         logger.info(f"MCPサーバーが {addr[0]}:{addr[1]} で正常に起動しました")
@@ -606,3 +1267,5 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"サーバーの起動に失敗: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        stop_logging()
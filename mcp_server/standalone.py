@@ -131,8 +131,10 @@ def create_files_from_parsed_data(parsed_data, base_dir="."):
             os.makedirs(dir_name, exist_ok=True)
 
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(content)
+            # 内容は一度だけエンコードし、テキスト層を介さずバイト列として書き込む
+            data = content.encode("utf-8")
+            with open(filepath, "wb") as f:
+                f.write(data)
             print(f"# {file_info['filepath']}")
             print("ファイルを作成/更新しました")
             print(f"{filepath}")
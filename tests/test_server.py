@@ -0,0 +1,462 @@
+# Test file for MCP server (server.py) functionality
+
+import asyncio
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+# Add mcp_server to Python path for testing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mcp_server"))
+
+try:
+    import server
+except ImportError:
+    # mcp パッケージが利用できない場合のフォールバック
+    server = None
+
+
+SAMPLE_MD = """
+## ./test.py
+
+### 変更内容
+テストファイルの作成
+
+### ./test.py
+```python
+def hello():
+    return "Hello, World!"
+```
+
+## ./docs/README.md
+
+### ./docs/README.md
+```markdown
+# Test Project
+
+```bash
+echo nested
+```
+```
+"""
+
+
+def test_parse_markdown_sections():
+    """Test markdown parsing functionality."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    result = server.parse_input_md_sections(SAMPLE_MD)
+
+    assert len(result) == 2
+    assert result[0]["filepath"] == "test.py"
+    assert result[0]["content"] == 'def hello():\n    return "Hello, World!"'
+    assert result[0]["change_description"] == "テストファイルの作成"
+    assert result[1]["filepath"] == "docs/README.md"
+    assert result[1]["content"] == "# Test Project\n\n```bash\necho nested\n```"
+    assert result[1]["change_description"] == ""
+
+
+def test_create_files_from_parsed_data():
+    """Test asynchronous file creation functionality."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        parsed_data = [
+            {"filepath": "a.txt", "content": "first", "change_description": ""},
+            {"filepath": "sub/b.txt", "content": "B", "change_description": "x"},
+            {"filepath": "a.txt", "content": "second", "change_description": ""},
+        ]
+
+        result = asyncio.run(
+            server.create_files_from_parsed_data(parsed_data, temp_dir)
+        )
+
+        with open(os.path.join(temp_dir, "a.txt"), "r", encoding="utf-8") as f:
+            assert f.read() == "second"
+        with open(os.path.join(temp_dir, "sub", "b.txt"), "r", encoding="utf-8") as f:
+            assert f.read() == "B"
+
+        assert result.startswith("___\n# a.txt\n")
+        assert result.count("ファイルを作成/更新しました") == 3
+        assert "## 変更内容\nx\n___" in result
+
+
+def test_create_files_merges_different_spellings_of_one_path(monkeypatch):
+    """Test that equivalent path spellings are written once, last one winning."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        parsed_data = [
+            {"filepath": "a.txt", "content": "x" * 4_000_000, "change_description": ""},
+            {"filepath": "sub/../a.txt", "content": "middle", "change_description": ""},
+            {"filepath": "./a.txt", "content": "second", "change_description": ""},
+        ]
+        writes = []
+        original_write_file = server._write_file
+
+        def recording_write_file(filepath, content):
+            writes.append(filepath)
+            original_write_file(filepath, content)
+
+        monkeypatch.setattr(server, "_write_file", recording_write_file)
+        result = asyncio.run(
+            server.create_files_from_parsed_data(parsed_data, temp_dir)
+        )
+
+        assert writes == [os.path.join(temp_dir, "./a.txt")]
+        with open(os.path.join(temp_dir, "a.txt"), "r", encoding="utf-8") as f:
+            assert f.read() == "second"
+        assert result.count("ファイルを作成/更新しました") == 3
+
+
+def test_parse_markdown_sections_warns_on_every_call(caplog):
+    """Test that re-parsing the same input reports skipped files again."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    md = "## ./missing.txt\n本文のみ\n"
+
+    for _ in range(2):
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger="mcp_file_generator"):
+            assert server.parse_input_md_sections(md) == []
+        assert "missing.txt" in caplog.text
+
+
+def test_generate_files_from_markdown():
+    """Test the end-to-end generation from a markdown file."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "input.md")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_MD)
+        output_dir = os.path.join(temp_dir, "out")
+
+        result = asyncio.run(
+            server.generate_files_from_markdown(input_path, output_dir)
+        )
+
+        assert "ファイル作成プロセスが完了しました。" in result
+        with open(os.path.join(output_dir, "test.py"), "r", encoding="utf-8") as f:
+            assert "def hello():" in f.read()
+        assert os.path.exists(os.path.join(output_dir, "docs", "README.md"))
+
+        missing = asyncio.run(
+            server.generate_files_from_markdown(
+                os.path.join(temp_dir, "missing.md"), output_dir
+            )
+        )
+        assert "見つかりません" in missing
+
+
+def test_parse_ignores_change_description_inside_content():
+    """Test that '### 変更内容' inside the code block is treated as content."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    md = "## ./notes.md\n\n### ./notes.md\n```markdown\n### 変更内容\n本文\n```\n"
+
+    result = server.parse_input_md_sections(md)
+
+    assert len(result) == 1
+    assert result[0]["content"] == "### 変更内容\n本文"
+    assert result[0]["change_description"] == ""
+
+
+def test_iter_file_infos_from_lines_matches_default_parser():
+    """Test that the line-based parser gives the same results as the default one."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    large_body = ("x" * 79 + "\n") * 100
+    md = (
+        SAMPLE_MD
+        + "___\nメモ\n"
+        + "## ./missing.txt\n本文のみ\n"
+        + "## ./large.txt\n### 変更内容\n大きなファイル\n\n### ./large.txt\n```\n"
+        + large_body
+        + "```\n"
+    )
+
+    expected = server.parse_input_md_sections(md)
+
+    assert list(server._iter_file_infos_from_lines(io.StringIO(md))) == expected
+    assert [f["filepath"] for f in expected] == [
+        "test.py",
+        "docs/README.md",
+        "large.txt",
+    ]
+    assert expected[2]["content"] == large_body.strip()
+    assert expected[2]["change_description"] == "大きなファイル"
+
+
+def test_create_files_from_markdown_stream_matches_in_memory_path():
+    """Test that streaming from disk creates the same files and report."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    md = SAMPLE_MD + "## ./test.py\n### ./test.py\n```python\nprint('last')\n```\n"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "input.md")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(md)
+        stream_dir = os.path.join(temp_dir, "stream")
+        memory_dir = os.path.join(temp_dir, "memory")
+
+        count, stream_result, stream_error = server._create_files_from_markdown_stream(
+            input_path, stream_dir
+        )
+        memory_result = asyncio.run(
+            server.create_files_from_parsed_data(
+                server.parse_input_md_sections(md), memory_dir
+            )
+        )
+
+        assert count == 3
+        assert stream_error is None
+        assert stream_result.replace(stream_dir, memory_dir) == memory_result
+        for relative_path in ("test.py", os.path.join("docs", "README.md")):
+            with open(os.path.join(stream_dir, relative_path), encoding="utf-8") as f:
+                streamed = f.read()
+            with open(os.path.join(memory_dir, relative_path), encoding="utf-8") as f:
+                assert streamed == f.read()
+        with open(os.path.join(stream_dir, "test.py"), encoding="utf-8") as f:
+            assert f.read() == "print('last')"
+
+
+def test_stop_logging_flushes_queued_records():
+    """Test that stopping the log listeners writes every queued record."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    test_logger = logging.getLogger("mcp_file_generator.test_flush")
+    test_logger.propagate = False
+    test_logger.setLevel(logging.INFO)
+    test_logger.addHandler(handler)
+    try:
+        server._start_log_listener([test_logger])
+        assert test_logger.handlers != [handler]
+        for i in range(2000):
+            test_logger.info("record %d", i)
+        server.stop_logging()
+
+        assert stream.getvalue().count("\n") == 2000
+        assert test_logger.handlers == [handler]
+    finally:
+        test_logger.removeHandler(handler)
+
+
+def test_log_listener_keeps_order_across_loggers():
+    """Test that records from several loggers reach a shared handler in order."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    shared_stream = io.StringIO()
+    shared_handler = logging.StreamHandler(shared_stream)
+    first_only_stream = io.StringIO()
+    first_only_handler = logging.StreamHandler(first_only_stream)
+    first = logging.getLogger("mcp_file_generator.test_order_first")
+    second = logging.getLogger("mcp_file_generator.test_order_second")
+    for test_logger, handlers in (
+        (first, [shared_handler, first_only_handler]),
+        (second, [shared_handler]),
+    ):
+        test_logger.propagate = False
+        test_logger.setLevel(logging.INFO)
+        for handler in handlers:
+            test_logger.addHandler(handler)
+    try:
+        server._start_log_listener([first, second])
+        for i in range(500):
+            first.info("first %d", i)
+            second.info("second %d", i)
+        server.stop_logging()
+
+        expected = []
+        for i in range(500):
+            expected += [f"first {i}", f"second {i}"]
+        assert shared_stream.getvalue().splitlines() == expected
+        assert first_only_stream.getvalue().splitlines() == expected[::2]
+    finally:
+        for test_logger in (first, second):
+            for handler in test_logger.handlers[:]:
+                test_logger.removeHandler(handler)
+
+
+def test_queued_log_records_are_written_at_exit():
+    """Test that importing the server and exiting keeps every log record."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    server_dir = os.path.dirname(os.path.abspath(server.__file__))
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {server_dir!r})\n"
+        "import server\n"
+        "for i in range(5000):\n"
+        "    server.logger.info('record %d', i)\n"
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=temp_dir,
+            check=True,
+            capture_output=True,
+        )
+
+        log_path = os.path.join(temp_dir, "logs", "mcp_server.log")
+        with open(log_path, "r", encoding="utf-8") as f:
+            assert sum("record " in line for line in f) == 5000
+
+
+def test_generate_files_from_markdown_streams_large_input(monkeypatch):
+    """Test the size dispatch to streaming, including a decode error mid-stream."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    monkeypatch.setattr(server, "_STREAM_PARSE_THRESHOLD", 0)
+    stream_calls = []
+    original_stream = server._create_files_from_markdown_stream
+
+    def recording_stream(*args):
+        stream_calls.append(args)
+        return original_stream(*args)
+
+    monkeypatch.setattr(server, "_create_files_from_markdown_stream", recording_stream)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "input.md")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_MD)
+        output_dir = os.path.join(temp_dir, "out")
+
+        result = asyncio.run(
+            server.generate_files_from_markdown(input_path, output_dir)
+        )
+
+        assert len(stream_calls) == 1
+        assert "ファイル作成プロセスが完了しました。" in result
+        assert result.count("ファイルを作成/更新しました") == 2
+        assert os.path.exists(os.path.join(output_dir, "docs", "README.md"))
+
+        # 最初のファイルの後に UTF-8 として不正なバイトがある入力
+        broken_path = os.path.join(temp_dir, "broken.md")
+        with open(broken_path, "wb") as f:
+            f.write("## ./a.txt\n### ./a.txt\n```\nA\n```\n___\n".encode("utf-8"))
+            f.write(("x" * 79 + "\n").encode("utf-8") * 200)
+            f.write(b"\xff\n## ./b.txt\n### ./b.txt\n```\nB\n```\n")
+        broken_dir = os.path.join(temp_dir, "broken")
+
+        broken = asyncio.run(
+            server.generate_files_from_markdown(broken_path, broken_dir)
+        )
+
+        assert "エラーが発生しました" in broken
+        assert "# a.txt\nファイルを作成/更新しました" in broken
+        assert "ファイル作成プロセスが完了しました。" not in broken
+        assert os.path.exists(os.path.join(broken_dir, "a.txt"))
+        assert not os.path.exists(os.path.join(broken_dir, "b.txt"))
+
+
+def test_tcp_server_round_trip():
+    """Test initialize and tools/list over the newline-delimited TCP transport."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    async def send(writer, message):
+        writer.write((json.dumps(message) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def receive(reader):
+        return json.loads(await asyncio.wait_for(reader.readline(), timeout=10))
+
+    async def round_trip():
+        tcp_server = await asyncio.start_server(
+            server._handle_tcp_client,
+            "127.0.0.1",
+            0,
+            limit=server.TCP_STREAM_LIMIT,
+        )
+        host, port = tcp_server.sockets[0].getsockname()[:2]
+        async with tcp_server:
+            reader, writer = await asyncio.open_connection(host, port)
+            await send(
+                writer,
+                {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "initialize",
+                    "params": {
+                        "protocolVersion": "2024-11-05",
+                        "capabilities": {},
+                        "clientInfo": {"name": "test-client", "version": "0.0.0"},
+                    },
+                },
+            )
+            initialized = await receive(reader)
+            await send(
+                writer, {"jsonrpc": "2.0", "method": "notifications/initialized"}
+            )
+            await send(writer, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+            tools = await receive(reader)
+            writer.close()
+            await writer.wait_closed()
+        return initialized, tools
+
+    initialized, tools = asyncio.run(round_trip())
+
+    assert initialized["id"] == 1
+    assert initialized["result"]["serverInfo"]["name"] == "file-generator-mcp"
+    assert tools["id"] == 2
+    assert [tool["name"] for tool in tools["result"]["tools"]] == [
+        "generate_files_from_markdown"
+    ]
+
+
+def test_parse_rejects_malformed_code_blocks(caplog):
+    """Test that malformed code blocks produce a warning and no file."""
+    if server is None:
+        # mcp パッケージが利用できない場合はスキップ
+        return
+
+    malformed_blocks = {
+        "unclosed.py": "```python\nprint(1)\n",
+        "four_backticks.txt": "```\nbody\n````\n",
+        "bad_lang.py": "```py thon\nprint(1)\n```\n",
+        "empty_fence.txt": "```\n```\n",
+    }
+
+    for filepath, block in malformed_blocks.items():
+        md = f"## ./{filepath}\n\n### ./{filepath}\n{block}"
+        for parse in (
+            server.parse_input_md_sections,
+            lambda text: list(server._iter_file_infos_from_lines(io.StringIO(text))),
+        ):
+            caplog.clear()
+            with caplog.at_level(logging.WARNING, logger="mcp_file_generator"):
+                assert parse(md) == []
+            assert f"'{filepath}' のコンテンツブロック" in caplog.text, filepath